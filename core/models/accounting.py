@@ -1,10 +1,11 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Literal, Optional, get_args
 from datetime import datetime
 from .common import gen_id
 
 EntryType = Literal["ACOMPTE", "SOLDE", "VENTE"]
+ENTRY_TYPES = frozenset(get_args(EntryType))  # test d'appartenance haché hors validation pydantic
 
 class AccountingEntry(BaseModel):
     id: str = Field(default_factory=gen_id)
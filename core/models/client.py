@@ -1,7 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field
+from typing import Annotated
+
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 from .common import gen_id
 
+# Contrôle de forme simple, exécuté par le moteur regex de pydantic-core
+# (EmailStr appelait email-validator en Python pour chaque client chargé)
+Email = Annotated[str, StringConstraints(strip_whitespace=True, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
+
 class Address(BaseModel):
+    model_config = ConfigDict(frozen=True)  # objet valeur : jamais modifié en place
+
     line1: str
     line2: str | None = None
     postal_code: str
@@ -11,7 +19,7 @@ class Client(BaseModel):
     id: str = Field(default_factory=gen_id)
     name: str
     contact_name: str | None = None
-    email: EmailStr | None = None
+    email: Email | None = None
     phone: str | None = None
     address: Address | None = None
     notes: str | None = None
@@ -1,9 +1,27 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-import uuid
+import os
+import threading
+
+# Réserve d'octets aléatoires : un seul appel os.urandom pour 256 identifiants
+_ID_BATCH = 256
+_id_buf = b""
+_id_pos = 0
+_id_lock = threading.Lock()
 
 def gen_id() -> str:
-    return str(uuid.uuid4())
+    """UUID v4 (RFC 4122) sous forme de chaîne, sans passer par uuid.UUID."""
+    global _id_buf, _id_pos
+    with _id_lock:
+        if _id_pos >= len(_id_buf):
+            _id_buf = os.urandom(16 * _ID_BATCH)
+            _id_pos = 0
+        b = bytearray(_id_buf[_id_pos:_id_pos + 16])
+        _id_pos += 16
+    b[6] = (b[6] & 0x0F) | 0x40  # version 4
+    b[8] = (b[8] & 0x3F) | 0x80  # variante RFC 4122
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 class TimeStamped(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
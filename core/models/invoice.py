@@ -1,13 +1,17 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional, get_args
 from datetime import datetime
 from .common import gen_id
 
 InvoiceType = Literal["ACOMPTE", "SOLDE", "FINALE"]
 InvoiceStatus = Literal["DRAFT", "ISSUED", "PAID"]
+INVOICE_TYPES = frozenset(get_args(InvoiceType))  # test d'appartenance haché hors validation pydantic
+INVOICE_STATUSES = frozenset(get_args(InvoiceStatus))
 
 class InvoiceLine(BaseModel):
+    model_config = ConfigDict(frozen=True)  # objet valeur : jamais modifié en place
+
     label: str
     qty: float = 1.0
     unit_price_ttc_cent: int = 0
@@ -1,15 +1,22 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from typing import Optional
-from .common import gen_id
 
 
 class Product(BaseModel):
-  id: str = Field(default_factory=gen_id)
-  ref: str
-  label: str
-  price_ttc_cent: int = 0
-  unit: str = "unité"
-  active: bool = True
-  # ✨ Nouveau
-  description: Optional[str] = None
+    id: Optional[str] = None
+    ref: Optional[str] = None
+    name: str = ""
+    label: Optional[str] = None
+    description: Optional[str] = None
+    price_cents: int = 0
+    unit: Optional[str] = ""
+    active: bool = True
+
+    @property
+    def price_ttc_cent(self) -> int:
+        return int(self.price_cents or 0)
+
+    @property
+    def price_eur(self) -> float:
+        return round((self.price_cents or 0) / 100.0, 2)
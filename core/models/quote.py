@@ -1,5 +1,5 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Literal, Optional
 from datetime import datetime, date
 from .common import gen_id
@@ -7,6 +7,8 @@ from .common import gen_id
 QuoteStatus = Literal["PENDING", "VALIDATED", "FINALIZED", "REFUSED"]
 
 class QuoteLine(BaseModel):
+    model_config = ConfigDict(frozen=True)  # objet valeur : jamais modifié en place
+
     item_id: Optional[str] = None
     item_type: Literal["product", "service"] = "service"
     label: str
@@ -25,6 +27,8 @@ class PaymentRecord(BaseModel):
     invoice_id: Optional[str] = None
 
 class Quote(BaseModel):
+    model_config = ConfigDict(extra="ignore")  # tolère d’anciennes clés dans les JSON
+
     id: str = Field(default_factory=gen_id)
     number: Optional[str] = None
     client_id: str
@@ -44,17 +48,25 @@ class Quote(BaseModel):
     terms: Optional[str] = None
 
     # helpers
+    def _paid_split(self) -> tuple[int, int]:
+        """(acomptes, soldes) encaissés, en un seul parcours des paiements."""
+        deposit = balance = 0
+        for p in self.payments:
+            if p.kind == "ACOMPTE":
+                deposit += p.amount_cent
+            elif p.kind == "SOLDE":
+                balance += p.amount_cent
+        return deposit, balance
+
     def paid_deposit_cent(self) -> int:
-        return sum(p.amount_cent for p in self.payments if p.kind == "ACOMPTE")
+        return self._paid_split()[0]
 
     def paid_balance_cent(self) -> int:
-        return sum(p.amount_cent for p in self.payments if p.kind == "SOLDE")
+        return self._paid_split()[1]
 
     def paid_total_cent(self) -> int:
-        return self.paid_deposit_cent() + self.paid_balance_cent()
+        deposit, balance = self._paid_split()
+        return deposit + balance
 
     def remaining_cent(self) -> int:
         return max(0, self.total_ttc_cent - self.paid_total_cent())
-
-    class Config:
-        extra = "ignore"  # tolère d’anciennes clés dans les JSON
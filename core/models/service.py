@@ -1,16 +1,24 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from typing import Optional
-from .common import gen_id
+
 
 class Service(BaseModel):
-    id: str = Field(default_factory=gen_id)
-    type: str = "service"
-    ref: str
-    label: str
-    description: str | None = None
-    price_ttc_cent: int
-    unit: str = "prestation"
-    active: bool = True
-    # ✨ Nouveau
+    id: Optional[str] = None
+    ref: Optional[str] = None
+    name: str = ""
+    label: Optional[str] = None
     description: Optional[str] = None
+    price_cents: int = 0
+    unit: Optional[str] = ""
+    active: bool = True
+
+    # Franchise TVA: TTC == HT
+    @property
+    def price_ttc_cent(self) -> int:
+        return int(self.price_cents or 0)
+
+    @property
+    def price_eur(self) -> float:
+        """Prix exprimé en euros pour édition/affichage."""
+        return round((self.price_cents or 0) / 100.0, 2)
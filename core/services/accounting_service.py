@@ -1,13 +1,32 @@
 from __future__ import annotations
-import os, json
-from typing import List
+import os
+from datetime import datetime
+from typing import List, Optional
 from pydantic import ValidationError
-from core.models.accounting import AccountingEntry
+from core.models.accounting import ENTRY_TYPES, AccountingEntry
 from core.storage.repo import JsonRepository
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data"))
 ACCOUNTING_JSON = os.path.join(DATA_DIR, "accounting_entries.json")
 
+def _construct_entry(d: dict) -> Optional[AccountingEntry]:
+    """
+    Écriture depuis une ligne de notre JSON (validée à l'écriture) sans re-validation.
+    Ligne atypique (type inconnu, date non ISO) → validation complète ; None si elle échoue.
+    """
+    # model_construct ne contrôle pas le Literal : type inconnu → validation
+    if d.get("type", "VENTE") in ENTRY_TYPES:
+        try:
+            if isinstance(d.get("date"), str):
+                d = {**d, "date": datetime.fromisoformat(d["date"])}
+            return AccountingEntry.model_construct(**d)
+        except (ValueError, TypeError):
+            pass
+    try:
+        return AccountingEntry.model_validate(d)
+    except ValidationError:
+        return None
+
 class AccountingService:
     def __init__(self, path: str = ACCOUNTING_JSON):
         self.repo = JsonRepository(path, key="id")
@@ -17,10 +36,6 @@ class AccountingService:
         return e
 
     def list_entries(self) -> List[AccountingEntry]:
-        out: List[AccountingEntry] = []
-        for d in self.repo.list_all():
-            try:
-                out.append(AccountingEntry(**d))
-            except ValidationError:
-                continue
-        return out
+        # Écritures produites par add_entry (déjà validées) → construction sans re-validation ;
+        # lignes invalides ignorées (None) pour ne pas bloquer tout le journal
+        return [e for e in map(_construct_entry, self.repo.list_all()) if e is not None]
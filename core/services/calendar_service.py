@@ -1,12 +1,43 @@
 from __future__ import annotations
-import os, json
+import functools
+import os
 from datetime import datetime, timedelta
 from typing import Optional
 
+from core.storage.json_repo import _loads
+
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data"))
 SETTINGS_JSON = os.path.join(DATA_DIR, "settings.json")
 EXPORTS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "exports", "agenda"))
 
+TOKEN_JSON = os.path.join(DATA_DIR, "token.json")
+CREDENTIALS_JSON = os.path.join(DATA_DIR, "credentials.json")
+
+
+@functools.lru_cache(maxsize=1)
+def _google_service():
+    """Client Google Calendar authentifié, construit une seule fois par process."""
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+    SCOPES = ["https://www.googleapis.com/auth/calendar"]
+    creds = None
+    if os.path.exists(TOKEN_JSON):
+        creds = Credentials.from_authorized_user_file(TOKEN_JSON, SCOPES)
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+        else:
+            if not os.path.exists(CREDENTIALS_JSON):
+                raise RuntimeError("credentials.json manquant pour Google Calendar")
+            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_JSON, SCOPES)
+            creds = flow.run_local_server(port=0)
+        with open(TOKEN_JSON, "w", encoding="utf-8") as f:
+            f.write(creds.to_json())
+    return build("calendar", "v3", credentials=creds)
+
+
 class CalendarService:
     def __init__(self):
         os.makedirs(EXPORTS_DIR, exist_ok=True)
@@ -14,34 +45,16 @@ class CalendarService:
     def _load_json(self, path: str):
         if not os.path.exists(path): return None
         try:
-            with open(path, "r", encoding="utf-8") as f: return json.load(f)
+            with open(path, "rb") as f: return _loads(f.read())  # orjson si installé
         except Exception: return None
 
     def create_event_for_quote(self, *, title: str, date_only: datetime, description: str) -> str:
         # Tentative Google
         try:
-            from google.oauth2.credentials import Credentials
-            from google_auth_oauthlib.flow import InstalledAppFlow
-            from googleapiclient.discovery import build
-            SCOPES = ["https://www.googleapis.com/auth/calendar"]
-            token_path = os.path.join(DATA_DIR, "token.json")
-            cred_path = os.path.join(DATA_DIR, "credentials.json")
-            creds = None
-            if os.path.exists(token_path):
-                creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-            if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    from google.auth.transport.requests import Request
-                    creds.refresh(Request())
-                else:
-                    if not os.path.exists(cred_path):
-                        raise RuntimeError("credentials.json manquant pour Google Calendar")
-                    flow = InstalledAppFlow.from_client_secrets_file(cred_path, SCOPES)
-                    creds = flow.run_local_server(port=0)
-                with open(token_path, "w", encoding="utf-8") as f:
-                    f.write(creds.to_json())
-
-            service = build("calendar", "v3", credentials=creds)
+            # Google non configuré → ICS directement, sans importer le SDK (plusieurs centaines de ms)
+            if not (os.path.exists(TOKEN_JSON) or os.path.exists(CREDENTIALS_JSON)):
+                raise RuntimeError("Google Agenda non configuré")
+            service = _google_service()
             start = datetime(date_only.year, date_only.month, date_only.day)
             end = start + timedelta(days=1)
             body = {
@@ -1,68 +1,37 @@
 from __future__ import annotations
 
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, TypeVar
-
-try:
-    # pydantic v2
-    from pydantic import BaseModel
-    _HAS_PYDANTIC = True
-except Exception:  # pragma: no cover
-    _HAS_PYDANTIC = False
-
-    class BaseModel:  # type: ignore
-        def __init__(self, **data):
-            for k, v in data.items():
-                setattr(self, k, v)
-        def model_dump(self) -> Dict[str, Any]:
-            return dict(self.__dict__)
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from uuid import uuid4
 
-from core.storage.json_repo import JsonRepository
-
-
-# ----------------- Modèles ----------------- #
-
-class Service(BaseModel):
-    id: Optional[str] = None
-    ref: Optional[str] = None
-    name: str = ""
-    label: Optional[str] = None
-    description: Optional[str] = None
-    price_cents: int = 0
-    unit: Optional[str] = ""
-    active: bool = True
+from pydantic import BaseModel
 
-    # Franchise TVA: TTC == HT
-    @property
-    def price_ttc_cent(self) -> int:
-        return int(self.price_cents or 0)
-
-    @property
-    def price_eur(self) -> float:
-        """Prix exprimé en euros pour édition/affichage."""
-        return round((self.price_cents or 0) / 100.0, 2)
+from core.models.product import Product
+from core.models.service import Service
+from core.storage.json_repo import JsonRepository
 
 
-class Product(BaseModel):
-    id: Optional[str] = None
-    ref: Optional[str] = None
-    name: str = ""
-    label: Optional[str] = None
-    description: Optional[str] = None
-    price_cents: int = 0
-    unit: Optional[str] = ""
-    active: bool = True
+T = TypeVar("T", bound=BaseModel)
 
-    @property
-    def price_ttc_cent(self) -> int:
-        return int(self.price_cents or 0)
+# Résolu une fois à l'import (resolve() coûte un appel système par composant)
+_DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 
-    @property
-    def price_eur(self) -> float:
-        return round((self.price_cents or 0) / 100.0, 2)
+# Clés de prix héritées, par ordre de priorité
+_CENT_KEYS = ("price_cents", "price_cent", "price_ttc_cent", "price_ht_cent")
+_EUR_KEYS = ("price", "price_eur")
+_PRICE_KEYS = frozenset(_CENT_KEYS + _EUR_KEYS)
 
 
-T = TypeVar("T", bound=BaseModel)
+def _eur_to_cents(v: Any) -> int:
+    """'18,50' / '18.5' / 18.5 → 1850 en arithmétique entière (pas d'arrondi flottant)."""
+    s = format(v, "f") if isinstance(v, float) else str(v).strip()
+    neg = s.startswith("-")
+    ip, _, fp = s.lstrip("+-").replace(",", ".").partition(".")
+    if not (ip or fp) or not (ip or "0").isdecimal() or (fp and not fp.isdecimal()):
+        raise ValueError(f"Prix invalide : {v!r}")
+    cents = int(ip or "0") * 100 + (int((fp + "000")[:3]) + 5) // 10  # arrondi au centime
+    return -cents if neg else cents
 
 
 # ----------------- Service Catalogue ----------------- #
@@ -81,23 +50,31 @@ class CatalogService:
         products_repo: Optional[JsonRepository] = None,
         data_dir: Optional[str | Path] = None,
     ) -> None:
-        base = Path(data_dir) if data_dir else Path(__file__).resolve().parents[2] / "data"
-        base.mkdir(parents=True, exist_ok=True)
-
-        self.services_repo = services_repo or JsonRepository(
-            base / "services.json", entity_name="service", key="id"
-        )
-        self.products_repo = products_repo or JsonRepository(
-            base / "products.json", entity_name="product", key="id"
-        )
+        # Aucun accès disque ici : les repos sont créés au premier usage
+        self._base = Path(data_dir) if data_dir else _DEFAULT_DATA_DIR
+        if services_repo is not None:
+            self.__dict__["services_repo"] = services_repo
+        if products_repo is not None:
+            self.__dict__["products_repo"] = products_repo
+        # Listes hydratées, invalidées dès que le fichier change (stat) ou à l'écriture
+        self._cache: Dict[str, Tuple[tuple, List[Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = {}
+
+    @cached_property
+    def services_repo(self) -> JsonRepository:
+        return JsonRepository(self._base / "services.json", entity_name="service", key="id")
+
+    @cached_property
+    def products_repo(self) -> JsonRepository:
+        return JsonRepository(self._base / "products.json", entity_name="product", key="id")
 
     # ---------- Helpers ---------- #
 
-    def _to_dict(self, obj: Any) -> Dict[str, Any]:
-        if isinstance(obj, dict):
+    def _to_dict(self, obj: Any, *, partial: bool = False) -> Dict[str, Any]:
+        """partial=True (mise à jour) : seuls les champs renseignés, pour ne pas écraser l'existant par des défauts."""
+        if isinstance(obj, dict):  # cas de l'UI, testé en premier
             return dict(obj)
         if hasattr(obj, "model_dump"):
-            return obj.model_dump()  # pydantic v2
+            return obj.model_dump(exclude_unset=partial)  # pydantic v2
         try:
             return dict(obj.__dict__)  # fallback objet simple
         except Exception:
@@ -105,153 +82,256 @@ class CatalogService:
     
     def _parse_price_cents(self, payload: Dict[str, Any]) -> int:
         """Convertit price_eur → price_cents si présent, sinon essaie tous les anciens champs."""
+        get = payload.get
         # 1) priorité au champ euros (édition UI)
-        if "price_eur" in payload and payload["price_eur"] not in (None, ""):
+        v = get("price_eur")
+        if v not in (None, ""):
             try:
-                val = float(str(payload["price_eur"]).replace(",", "."))
-                return max(0, int(round(val * 100)))
-            except Exception:
+                return max(0, _eur_to_cents(v))
+            except ValueError:
                 pass
 
         # 2) anciens champs en centimes (json hérités)
-        for k in ("price_cents", "price_cent", "price_ttc_cent", "price_ht_cent"):
-            if k in payload and payload[k] not in (None, ""):
+        for k in _CENT_KEYS:
+            v = get(k)
+            if type(v) is int:  # cas courant : entier JSON, pas de try/except
+                return max(0, v)
+            if v not in (None, ""):
                 try:
-                    return max(0, int(payload[k]))
+                    return max(0, int(v))
                 except Exception:
                     pass
 
         # 3) anciens champs en euros string/float
-        for k in ("price", "price_eur"):
-            if k in payload and payload[k] not in (None, ""):
+        for k in _EUR_KEYS:
+            v = get(k)
+            if v not in (None, ""):
                 try:
-                    val = float(str(payload[k]).replace(",", "."))
-                    return max(0, int(round(val * 100)))
-                except Exception:
+                    return max(0, _eur_to_cents(v))
+                except ValueError:
                     pass
 
         return 0
 
-    def _ensure_defaults(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalise avant écriture: label, unit, price_cents depuis price_eur/anciens champs."""
-        name = payload.get("name") or ""
-        if not payload.get("label"):
-            payload["label"] = name
-        if payload.get("unit") is None:
+    def _normalize(self, payload: Dict[str, Any], *, partial: bool = False) -> Dict[str, Any]:
+        """
+        Normalise avant écriture, en une passe : label, unit, price_cents (stockage,
+        depuis price_eur/anciens champs) et price_eur (UI) cohérents.
+        partial=True (mise à jour) : un champ n'est dérivé que si sa source figure dans
+        le payload, sinon la valeur stockée est conservée à la fusion.
+        """
+        if not payload.get("label") and (not partial or "label" in payload):
+            payload["label"] = payload.get("name") or ""
+        if payload.get("unit") is None and (not partial or "unit" in payload):
             payload["unit"] = ""
-        payload["price_cents"] = self._parse_price_cents(payload)
+        if not partial or any(k in payload for k in _PRICE_KEYS):
+            cents = payload["price_cents"] = self._parse_price_cents(payload)
+            if payload.get("price_eur") in (None, ""):
+                payload["price_eur"] = cents / 100.0
         return payload
 
-    def _sync_prices(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _with_price_cents(self, d: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconstruit price_cents (int) depuis tous les champs possibles si absent/0/non entier."""
+        pc = d.get("price_cents")
+        if not isinstance(pc, int) or pc == 0:
+            d = {**d, "price_cents": self._parse_price_cents(d)}
+        if not d.get("label") or d.get("unit") is None:
+            d = {**d, "label": d.get("label") or d.get("name") or "", "unit": d.get("unit") or ""}
+        return d
+
+    def _hydrate(self, d: Dict[str, Any], model: Type[T], *, trusted: bool = True) -> T:
         """
-        Force cohérence entre price_eur (UI) et price_cents (stockage).
+        Hydrate un dict JSON en objet modèle, en reconstruisant price_cents si besoin.
+        trusted=True (lecture de nos propres JSON) → model_construct, sans re-validation ;
+        trusted=False (données externes, add/update) → model_validate, lève ValidationError.
         """
-        if "price_eur" in payload and payload["price_eur"] not in (None, ""):
-            try:
-                val = float(str(payload["price_eur"]).replace(",", "."))
-                payload["price_cents"] = int(round(val * 100))
-            except Exception:
-                payload["price_cents"] = int(payload.get("price_cents") or 0)
-        else:
-            try:
-                payload["price_eur"] = (int(payload.get("price_cents") or 0) / 100.0)
-            except Exception:
-                payload["price_eur"] = 0.0
-        return payload
-
-    def _hydrate(self, d: Dict[str, Any], model: Type[T]) -> T:
-        """Hydrate un dict JSON en objet modèle, en reconstruisant price_cents si besoin."""
         if d is None:
             raise ValueError("Object not found")
-        # Reconstruire price_cents depuis tous les champs possibles si absent/0
-        pc = d.get("price_cents")
-        if pc in (None, "", 0):
-            d = {**d, "price_cents": self._parse_price_cents(d)}
-        # Création objet
-        if _HAS_PYDANTIC and hasattr(model, "model_validate"):
-            obj: T = model.model_validate(d)  # type: ignore[attr-defined]
-        else:
-            obj = model(**d)  # type: ignore[call-arg]
-        return obj
+        d = self._with_price_cents(d)
+        if trusted:
+            return model.model_construct(**d)
+        return model.model_validate(d)
 
     def _hydrate_list(self, rows: List[Dict[str, Any]], model: Type[T]) -> List[T]:
-        return [self._hydrate(d, model) for d in rows]
+        hydrate = self._hydrate
+        return [hydrate(d, model) for d in rows]
+
+    def _cached(self, name: str, repo: JsonRepository, model: Type[T]) -> Tuple[tuple, List[T], Dict[str, T], Dict[str, T], Dict[str, T]]:
+        """(stat, objets, index ref, index libellé casefold, index id), reconstruits quand le fichier change."""
+        key = repo.stat_key()
+        hit = self._cache.get(name)
+        if hit is None or hit[0] != key:
+            items = self._hydrate_list(repo.list_all(), model)
+            by_ref: Dict[str, T] = {}
+            by_label: Dict[str, T] = {}
+            by_id: Dict[str, T] = {}
+            for it in items:
+                if it.id is not None:  # type: ignore[attr-defined]
+                    by_id.setdefault(str(it.id), it)  # type: ignore[attr-defined]
+                ref = (it.ref or "").strip()  # type: ignore[attr-defined]
+                if ref:
+                    by_ref.setdefault(ref, it)
+                lbl = (it.label or it.name or "").strip().casefold()  # type: ignore[attr-defined]
+                if lbl:
+                    by_label.setdefault(lbl, it)
+            hit = (key, items, by_ref, by_label, by_id)
+            self._cache[name] = hit
+        return hit
+
+    def _cached_list(self, name: str, repo: JsonRepository, model: Type[T]) -> List[T]:
+        # copie de la liste ; les objets restent ceux du cache (lecture seule pour l'appelant)
+        return list(self._cached(name, repo, model)[1])
+
+    @staticmethod
+    def _build_index(rows: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, int], Dict[Any, int]]:
+        """Index id / ref / (name, unit) → position, en une passe (la 1re occurrence gagne)."""
+        by_id: Dict[str, int] = {}
+        by_ref: Dict[str, int] = {}
+        by_name_unit: Dict[Any, int] = {}
+        for i, r in enumerate(rows):
+            CatalogService._index_row(r, i, by_id, by_ref, by_name_unit)
+        return by_id, by_ref, by_name_unit
+
+    @staticmethod
+    def _reindex(rows: List[Dict[str, Any]], index: Tuple[Dict[str, int], Dict[str, int], Dict[Any, int]]) -> None:
+        """Reconstruit l'index en place (après changement d'id/ref/name/unit d'une ligne)."""
+        for d in index:
+            d.clear()
+        for i, r in enumerate(rows):
+            CatalogService._index_row(r, i, *index)
+
+    @staticmethod
+    def _index_row(r: Dict[str, Any], i: int, by_id: Dict[str, int], by_ref: Dict[str, int], by_name_unit: Dict[Any, int]) -> None:
+        if r.get("id") is not None:
+            by_id.setdefault(str(r["id"]), i)
+        if r.get("ref"):
+            by_ref.setdefault(str(r["ref"]), i)
+        by_name_unit.setdefault((r.get("name"), r.get("unit")), i)
+
+    @staticmethod
+    def _lookup(index: Tuple[Dict[str, int], Dict[str, int], Dict[Any, int]], payload: Dict[str, Any]) -> Optional[int]:
+        """id, puis ref, puis name + unit."""
+        by_id, by_ref, by_name_unit = index
+        idx = None
+        if payload.get("id"):
+            idx = by_id.get(str(payload["id"]))
+        if idx is None and payload.get("ref"):
+            idx = by_ref.get(str(payload["ref"]))
+        if idx is None and payload.get("name"):
+            idx = by_name_unit.get((payload["name"], payload.get("unit", "")))
+        return idx
 
     def _smart_upsert(self, repo: JsonRepository, payload: Dict[str, Any]) -> Dict[str, Any]:
-        rows = repo.list_all()
+        return self._smart_upsert_many(repo, [payload])[0]
 
-        # id
-        if payload.get("id"):
-            for i, r in enumerate(rows):
-                if str(r.get("id")) == str(payload["id"]):
-                    merged = {**r, **payload}
-                    rows[i] = merged
-                    repo._write_raw(rows)  # type: ignore
-                    return merged
-
-        # ref
-        if payload.get("ref"):
-            for i, r in enumerate(rows):
-                if r.get("ref") and str(r["ref"]) == str(payload["ref"]):
-                    merged = {**r, **payload}
-                    rows[i] = merged
-                    repo._write_raw(rows)  # type: ignore
-                    return merged
-
-        # name + unit
-        if payload.get("name"):
-            for i, r in enumerate(rows):
-                if (r.get("name") == payload["name"]) and (r.get("unit") == payload.get("unit", "")):
-                    merged = {**r, **payload}
-                    rows[i] = merged
-                    repo._write_raw(rows)  # type: ignore
-                    return merged
-
-        # sinon add
-        return repo.add(payload)
+    def _smart_upsert_many(self, repo: JsonRepository, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upsert en masse : index construit une fois, mis à jour au fil de l'eau, une seule écriture."""
+        rows = repo.list_all()
+        index = self._build_index(rows)
+        k = repo.key
+        out: List[Dict[str, Any]] = []
+        changed = False
+        for payload in payloads:
+            idx = self._lookup(index, payload)
+            if idx is None:
+                # nouvelle ligne : défauts complets, comme add_*
+                merged = self._normalize(dict(payload))
+                if not merged.get(k):
+                    merged[k] = uuid4().hex
+                idx = len(rows)
+                rows.append(merged)
+                self._index_row(merged, idx, *index)
+                changed = True
+            else:
+                merged = rows[idx]
+                # payload identique à la ligne stockée (rafraîchissement UI) → rien à écrire
+                if not all(f in merged and merged[f] == v for f, v in payload.items()):
+                    # rows vient d'être lu : fusion en place, sans copier la ligne
+                    before = (merged.get("id"), merged.get("ref"), merged.get("name"), merged.get("unit"))
+                    merged.update(payload)
+                    if before != (merged.get("id"), merged.get("ref"), merged.get("name"), merged.get("unit")):
+                        # clés de recherche modifiées : l'ancien index pointerait sur de mauvaises lignes
+                        self._reindex(rows, index)
+                    changed = True
+            out.append(merged)
+        if changed:
+            repo._write_raw(rows)  # type: ignore
+        return out
+
+    # ---------- Recherche ---------- #
+
+    def find_by_ref(self, ref: str) -> Optional[Any]:
+        """Produit (prioritaire) ou service de référence exacte, via l'index du cache."""
+        ref = (ref or "").strip()
+        if not ref:
+            return None
+        obj = (self._cached("products", self.products_repo, Product)[2].get(ref)
+               or self._cached("services", self.services_repo, Service)[2].get(ref))
+        return obj.model_copy() if obj is not None else None
+
+    def find_by_label(self, label: str) -> Optional[Any]:
+        """Produit (prioritaire) ou service dont label/name correspond, insensible à la casse."""
+        lbl = (label or "").strip().casefold()
+        if not lbl:
+            return None
+        obj = (self._cached("products", self.products_repo, Product)[3].get(lbl)
+               or self._cached("services", self.services_repo, Service)[3].get(lbl))
+        return obj.model_copy() if obj is not None else None
 
     # ---------- Services ---------- #
 
     def list_services(self) -> List[Service]:
-        return self._hydrate_list(self.services_repo.list_all(), Service)
+        return self._cached_list("services", self.services_repo, Service)
 
     def get_service(self, service_id: str) -> Service:
-        return self._hydrate(self.services_repo.get_by_id(service_id), Service)
+        obj = self._cached("services", self.services_repo, Service)[4].get(str(service_id))
+        if obj is None:
+            raise ValueError("Object not found")
+        return obj.model_copy()  # copie : modifier l'objet rendu ne touche pas le cache
 
     def add_service(self, s: Any) -> Dict[str, Any]:
-        payload = self._ensure_defaults(self._to_dict(s))
-        payload = self._sync_prices(payload)
+        payload = self._normalize(self._to_dict(s))
+        self._hydrate(payload, Service, trusted=False)
+        self._cache.pop("services", None)
         return self.services_repo.add(payload)
 
     def update_service(self, s: Any) -> Dict[str, Any]:
-        payload = self._ensure_defaults(self._to_dict(s))
-        payload = self._sync_prices(payload)
+        payload = self._normalize(self._to_dict(s, partial=True), partial=True)
         if not (payload.get("id") or payload.get("ref") or payload.get("name")):
             raise ValueError("update_service requires at least one key (id/ref/name)")
+        self._hydrate(payload, Service, trusted=False)
+        self._cache.pop("services", None)
         return self._smart_upsert(self.services_repo, payload)
 
     def delete_service(self, service_id: str) -> bool:
+        self._cache.pop("services", None)
         return self.services_repo.delete(service_id)
 
     # ---------- Produits ---------- #
 
     def list_products(self) -> List[Product]:
-        return self._hydrate_list(self.products_repo.list_all(), Product)
+        return self._cached_list("products", self.products_repo, Product)
 
     def get_product(self, product_id: str) -> Product:
-        return self._hydrate(self.products_repo.get_by_id(product_id), Product)
+        obj = self._cached("products", self.products_repo, Product)[4].get(str(product_id))
+        if obj is None:
+            raise ValueError("Object not found")
+        return obj.model_copy()  # copie : modifier l'objet rendu ne touche pas le cache
         
     def add_product(self, p: Any) -> Dict[str, Any]:
-        payload = self._ensure_defaults(self._to_dict(p))
-        payload = self._sync_prices(payload)
+        payload = self._normalize(self._to_dict(p))
+        self._hydrate(payload, Product, trusted=False)
+        self._cache.pop("products", None)
         return self.products_repo.add(payload)
 
     def update_product(self, p: Any) -> Dict[str, Any]:
-        payload = self._ensure_defaults(self._to_dict(p))
-        payload = self._sync_prices(payload)
+        payload = self._normalize(self._to_dict(p, partial=True), partial=True)
         if not (payload.get("id") or payload.get("ref") or payload.get("name")):
             raise ValueError("update_product requires at least one key (id/ref/name)")
+        self._hydrate(payload, Product, trusted=False)
+        self._cache.pop("products", None)
         return self._smart_upsert(self.products_repo, payload)
 
     def delete_product(self, product_id: str) -> bool:
+        self._cache.pop("products", None)
         return self.products_repo.delete(product_id)
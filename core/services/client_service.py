@@ -1,10 +1,10 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 
 from pydantic import ValidationError
 
-from core.models.client import Client
+from core.models.client import Address, Client
 from core.storage.repo import JsonRepository
 
 
@@ -12,37 +12,59 @@ DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__
 CLIENTS_JSON = os.path.join(DATA_DIR, "clients.json")
 
 
+def _construct_client(d: dict) -> Optional[Client]:
+    """
+    Client depuis une ligne de notre JSON (validée à l'écriture) sans re-validation.
+    Ligne atypique (nom ou adresse incomplets) → validation complète ; None si elle échoue.
+    """
+    addr = d.get("address")
+    if isinstance(d.get("name"), str) and (
+        addr is None or (isinstance(addr, dict) and all(k in addr for k in ("line1", "postal_code", "city")))
+    ):
+        if addr is not None:
+            d = {**d, "address": Address.model_construct(**addr)}
+        return Client.model_construct(**d)
+    try:
+        return Client.model_validate(d)
+    except ValidationError:
+        return None
+
+
 class ClientService:
     def __init__(self, path: str = CLIENTS_JSON):
         self.repo = JsonRepository(path, key="id")
+        # Liste hydratée, invalidée dès que le fichier change (stat) ou à l'écriture
+        self._cache: Optional[Tuple[tuple, List[Client], Dict[str, Client]]] = None
+
+    def _cached(self) -> Tuple[tuple, List[Client], Dict[str, Client]]:
+        """(stat, clients, index id → client), reconstruits quand le fichier change."""
+        key = self.repo.stat_key()
+        if self._cache is None or self._cache[0] != key:
+            # On ignore les entrées invalides (None) pour ne pas casser l'UI
+            clients = [c for c in map(_construct_client, self.repo.list_all()) if c is not None]
+            by_id: Dict[str, Client] = {}
+            for c in clients:
+                by_id.setdefault(c.id, c)
+            self._cache = (key, clients, by_id)
+        return self._cache
 
     def list_clients(self) -> List[Client]:
-        items = self.repo.list_all()
-        out: List[Client] = []
-        for d in items:
-            try:
-                out.append(Client(**d))
-            except ValidationError:
-                # On ignore les entrées invalides pour ne pas casser l'UI
-                continue
-        return out
+        return list(self._cached()[1])  # copie de la liste ; objets partagés avec le cache, en lecture seule
 
     def add_client(self, client: Client) -> Client:
+        self._cache = None
         self.repo.add(client.model_dump())
         return client
 
     def update_client(self, client: Client) -> Client:
+        self._cache = None
         self.repo.update(client.model_dump())
         return client
 
     def delete_client(self, client_id: str) -> None:
+        self._cache = None
         self.repo.delete(client_id)
 
     def get_by_id(self, client_id: str) -> Optional[Client]:
-        matches = self.repo.find(lambda d: d.get("id") == client_id)
-        if not matches:
-            return None
-        try:
-            return Client(**matches[0])
-        except ValidationError:
-            return None
+        c = self._cached()[2].get(client_id)
+        return c.model_copy() if c is not None else None  # copie : le cache reste intact
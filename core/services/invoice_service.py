@@ -1,22 +1,30 @@
 # core/services/invoice_service.py
 from __future__ import annotations
 import os
-import json
 import re
+import subprocess
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import cached_property, lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import Dict, Iterator, List, Optional, Literal, Tuple
 
 from pydantic import ValidationError
-import pdfkit  # utilisé si wkhtmltopdf dispo
 
-from core.models.invoice import Invoice, InvoiceLine
+from core.models.invoice import INVOICE_STATUSES, INVOICE_TYPES, Invoice, InvoiceLine
 from core.models.quote import Quote
-from core.models.client import Client
+from core.services.client_service import ClientService
+from core.storage.json_repo import _loads
 from core.storage.repo import JsonRepository
 
 # --- Chemins de base ---
 ROOT_DIR = Path(__file__).resolve().parents[2]  # erp_sonolight/
 TEMPLATES_DIR = ROOT_DIR / "templates" / "pdf"
+# ROOT_DIR est déjà résolu : chemins absolus calculés une fois pour tous les exports
+_BASE_URL = str(TEMPLATES_DIR)
+_CSS_PATH = str(TEMPLATES_DIR / "stylesheet.css")
 EXPORTS_DIR = ROOT_DIR / "exports"
 DATA_DIR = ROOT_DIR / "data"
 
@@ -26,19 +34,73 @@ CLIENTS_JSON = DATA_DIR / "clients.json"
 SETTINGS_JSON = DATA_DIR / "settings.json"
 
 # ---------- Utils JSON ----------
+# décodage partagé avec le stockage : orjson si installé, sinon json
 def _load_json(path: os.PathLike | str):
     p = Path(path)
     if not p.exists():
         return None
     try:
-        return json.loads(p.read_text(encoding="utf-8"))
+        return _loads(p.read_bytes())
     except Exception:
         return None
 
-def _dump_json(path: os.PathLike | str, data) -> None:
-    p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+# settings.json : relu et re-parsé seulement quand son mtime change
+_settings_cache: Optional[Tuple[Optional[int], dict]] = None
+
+def _settings_stamp() -> Optional[int]:
+    try:
+        return os.stat(SETTINGS_JSON).st_mtime_ns
+    except OSError:
+        return None
+
+def _load_settings() -> dict:
+    """Réglages partagés (lecture seule : copier avant de modifier)."""
+    global _settings_cache
+    stamp = _settings_stamp()
+    if _settings_cache is None or _settings_cache[0] != stamp:
+        s = _load_json(SETTINGS_JSON)
+        _settings_cache = (stamp, s if isinstance(s, dict) else {})
+    return _settings_cache[1]
+
+# Compteurs de numérotation des factures (un entier ASCII par fichier)
+_seq_lock = threading.Lock()
+
+@contextmanager
+def _seq_file_lock(path: Path) -> Iterator[None]:
+    """
+    Verrou exclusif inter-processus (msvcrt / fcntl) autour de lecture-incrément-écriture
+    d'un compteur. Posé sur un fichier .lock voisin : le compteur lui-même est remplacé
+    par os.replace, un verrou sur son inode ne protégerait pas l'écriture suivante.
+    """
+    fd = os.open(path.with_name(path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # réessaie pendant ~10 s puis OSError
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+def _write_seq(path: Path, value: int) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, str(value).encode("ascii"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
 
 # ---------- Formats ----------
 def _cent_to_eur(cents: int) -> str:
@@ -47,10 +109,11 @@ def _cent_to_eur(cents: int) -> str:
     except Exception:
         return "0.00 €"
 
+# caractères interdits dans un nom de fichier → "_" (str.translate, boucle C)
+_SLUG_BAD = str.maketrans({c: "_" for c in '\\/:*?"<>|\n\r\t'})
 def _slug(text: str) -> str:
-    text = (text or "").strip()
-    text = re.sub(r'[\\/:*?"<>|\n\r\t]', "_", text)
-    text = re.sub(r"\s+", " ", text)
+    # split/join sans regex : espaces multiples réduits à un seul (bords déjà retirés par strip)
+    text = " ".join((text or "").strip().translate(_SLUG_BAD).split())
     return text or "Client"
 
 # ---------- PDF helpers ----------
@@ -63,24 +126,28 @@ def _clean_path(p: str) -> str:
     return os.path.normpath(p)
 
 def _find_wkhtmltopdf() -> Optional[str]:
+    """Chemin de wkhtmltopdf, mémorisé tant que settings.json et les variables d'env ne changent pas."""
+    return _locate_wkhtmltopdf(_settings_stamp(), os.environ.get("WKHTMLTOPDF"), os.environ.get("WKHTMLTOPDF_CMD"))
+
+@lru_cache(maxsize=4)
+def _locate_wkhtmltopdf(settings_mtime: Optional[int], env: Optional[str], env_cmd: Optional[str]) -> Optional[str]:
     """
-    Localise wkhtmltopdf.exe :
+    Localise wkhtmltopdf.exe (settings_mtime = clé de cache seulement) :
     - Variables d'env (WKHTMLTOPDF, WKHTMLTOPDF_CMD)
     - data/settings.json -> pdf.wkhtmltopdf_path ou wkhtmltopdf_path
     - chemins Windows connus
     - PATH
     """
     # 1) Env
-    for env_key in ("WKHTMLTOPDF", "WKHTMLTOPDF_CMD"):
-        val = os.environ.get(env_key)
+    for val in (env, env_cmd):
         if val:
             path = _clean_path(val)
             if Path(path).is_file():
                 return path
 
     # 2) settings.json
-    s = _load_json(SETTINGS_JSON) or {}
-    if isinstance(s, dict):
+    s = _load_settings()
+    if s:
         pdf_conf = s.get("pdf", {}) if isinstance(s.get("pdf"), dict) else {}
         wk = pdf_conf.get("wkhtmltopdf_path") or s.get("wkhtmltopdf_path")
         if wk:
@@ -105,10 +172,59 @@ def _find_wkhtmltopdf() -> Optional[str]:
 
     return None
 
+@lru_cache(maxsize=4)
+def _pdfkit_config(wkhtml: str):
+    """Configuration pdfkit par exécutable (pdfkit.configuration sonde le binaire à chaque appel)."""
+    import pdfkit  # importé seulement si wkhtmltopdf est utilisé
+
+    return pdfkit.configuration(wkhtmltopdf=wkhtml)
+
+@lru_cache(maxsize=1)
+def _wkhtml_style_tag(_css_stamp: Optional[int]) -> str:
+    """<style> de stylesheet.css lu une fois par version du fichier (comme css= de pdfkit)."""
+    if _css_stamp is None:
+        return ""
+    with open(_CSS_PATH, encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
+
+def _render_pdf_with_wkhtmltopdf(wkhtml: str, html: str, out_path: Path) -> None:
+    """wkhtmltopdf appelé directement, HTML passé sur stdin (sans pdfkit ni shell)."""
+    try:
+        css_stamp = os.stat(_CSS_PATH).st_mtime_ns
+    except OSError:
+        css_stamp = None
+    style = _wkhtml_style_tag(css_stamp)
+    if style:
+        html = html.replace("</head>", style + "</head>") if "</head>" in html else style + html
+    # un ancien export ne doit pas faire passer un échec pour un succès
+    out_path.unlink(missing_ok=True)
+    proc = subprocess.run(
+        [wkhtml, "--enable-local-file-access", "--quiet", "--encoding", "UTF-8", "-", str(out_path)],
+        input=html.encode("utf-8"),
+        capture_output=True,
+    )
+    # code 1 = avertissements (ressource introuvable…) : PDF produit quand même. --quiet
+    # supprime le "Done" que pdfkit cherche, on juge donc sur le fichier écrit
+    ok = proc.returncode == 0 or (proc.returncode == 1 and out_path.is_file() and out_path.stat().st_size > 0)
+    if not ok:
+        err = (proc.stderr or proc.stdout).decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"wkhtmltopdf a échoué (code {proc.returncode}): {err}")
+
+_CSS_LINK = re.compile(r'<link[^>]+href="stylesheet\.css"[^>]*>')
+
+@lru_cache(maxsize=1)
+def _weasy_stylesheets(_css_stamp: Optional[int]):
+    """stylesheet.css parsée une fois par version du fichier (argument = clé de cache)."""
+    if _css_stamp is None:
+        return None
+    from weasyprint import CSS
+
+    return [CSS(filename=_CSS_PATH)]
+
 def _render_pdf_with_weasyprint(html: str, out_path: Path, base_url: Optional[str]) -> None:
     """Fallback WeasyPrint (si wkhtmltopdf absent)."""
     try:
-        from weasyprint import HTML, CSS
+        from weasyprint import HTML
     except Exception as e:
         raise RuntimeError(
             "Aucun wkhtmltopdf trouvé et WeasyPrint n'est pas installé. "
@@ -116,44 +232,114 @@ def _render_pdf_with_weasyprint(html: str, out_path: Path, base_url: Optional[st
             f"Détails: {e}"
         ) from e
 
-    css_file = TEMPLATES_DIR / "stylesheet.css"
-    styles = [CSS(filename=str(css_file))] if css_file.exists() else None
+    try:
+        css_stamp = os.stat(_CSS_PATH).st_mtime_ns
+    except OSError:
+        css_stamp = None
+    styles = _weasy_stylesheets(css_stamp)
+    if styles:
+        # feuille déjà fournie pré-parsée : le <link> la ferait charger et parser une 2e fois
+        html = _CSS_LINK.sub("", html)
     HTML(string=html, base_url=base_url).write_pdf(str(out_path), stylesheets=styles)
 
+_line_total = attrgetter("total_line_ttc_cent")
+
+def _invoice_total(lines: List[InvoiceLine]) -> int:
+    """Somme des lignes ; cas courant (acompte, solde : une seule ligne) sans itération."""
+    if len(lines) == 1:
+        return lines[0].total_line_ttc_cent
+    return sum(map(_line_total, lines))
+
+# Mention portée par toutes les factures générées (auto-entrepreneur, pas de TVA)
+_NOTES_TVA = "TVA non applicable, art. 293 B du CGI."
+
+# Code de type de facture (numérotation et noms de fichiers)
+_INVOICE_TYPE_CODES = {"ACOMPTE": "A", "SOLDE": "S", "FINALE": "F"}
+
+# ---------- Templates ----------
+@lru_cache(maxsize=1)
+def _jinja_env():
+    """Environnement Jinja2 unique : les templates compilés restent en cache (rechargés si modifiés)."""
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATES_DIR)),
+        autoescape=select_autoescape(["html", "xml"])
+    )
+
+# ---------- Hydratation ----------
+_INVOICE_DATES = ("created_at", "issued_at", "paid_at")
+
+def _line_ok(ln: object) -> bool:
+    """Ligne de facture telle que nous l'écrivons : libellé texte, montants entiers."""
+    return (isinstance(ln, dict) and isinstance(ln.get("label"), str)
+            and type(ln.get("unit_price_ttc_cent", 0)) is int
+            and type(ln.get("total_line_ttc_cent", 0)) is int)
+
+def _construct_invoice(d: dict) -> Optional[Invoice]:
+    """
+    Facture depuis une ligne de notre JSON (validée à l'écriture) sans re-validation.
+    Ligne atypique (champ requis absent, Literal inconnu, date non ISO, ligne de facture
+    incomplète) → validation complète ; None si elle échoue.
+    """
+    lines = d.get("lines") or []
+    if ("quote_id" in d and "client_id" in d
+            and d.get("type", "ACOMPTE") in INVOICE_TYPES
+            and d.get("status", "DRAFT") in INVOICE_STATUSES
+            and isinstance(lines, list) and all(map(_line_ok, lines))):
+        try:
+            d = dict(d)
+            for k in _INVOICE_DATES:
+                if isinstance(d.get(k), str):
+                    d[k] = datetime.fromisoformat(d[k])
+            d["lines"] = [InvoiceLine.model_construct(**ln) for ln in lines]
+            return Invoice.model_construct(**d)
+        except (ValueError, TypeError):
+            pass
+    try:
+        return Invoice.model_validate(d)
+    except ValidationError:
+        return None
+
 # ---------- Service ----------
 class InvoiceService:
     def __init__(self, path: os.PathLike | str = INVOICES_JSON):
         self.repo = JsonRepository(str(path), key="id")
+        # Liste hydratée, invalidée dès que le fichier change (stat) ou à l'écriture
+        self._cache: Optional[Tuple[tuple, List[Invoice], Dict[str, Invoice], Dict[str, List[Invoice]]]] = None
+
+    @cached_property
+    def _clients(self) -> ClientService:
+        return ClientService(str(CLIENTS_JSON))
 
     # ----------- CRUD/list -----------
+    def _cached(self) -> Tuple[tuple, List[Invoice], Dict[str, Invoice], Dict[str, List[Invoice]]]:
+        """(stat, factures, index id → facture, index devis → factures), reconstruits quand le fichier change."""
+        key = self.repo.stat_key()
+        if self._cache is None or self._cache[0] != key:
+            # lignes invalides ignorées (None)
+            invoices = [inv for inv in map(_construct_invoice, self.repo.list_all()) if inv is not None]
+            by_id: Dict[str, Invoice] = {}
+            by_quote: Dict[str, List[Invoice]] = {}
+            for inv in invoices:
+                by_id.setdefault(inv.id, inv)
+                by_quote.setdefault(inv.quote_id, []).append(inv)
+            self._cache = (key, invoices, by_id, by_quote)
+        return self._cache
+
     def list_invoices(self) -> List[Invoice]:
-        out: List[Invoice] = []
-        for d in self.repo.list_all():
-            try:
-                out.append(Invoice(**d))
-            except ValidationError:
-                continue
-        return out
+        return list(self._cached()[1])  # copie de la liste ; objets partagés avec le cache, en lecture seule
 
     def list_by_quote(self, quote_id: str) -> List[Invoice]:
-        out: List[Invoice] = []
-        for d in self.repo.find(lambda x: x.get("quote_id") == quote_id):
-            try:
-                out.append(Invoice(**d))
-            except ValidationError:
-                continue
-        return out
+        return list(self._cached()[3].get(quote_id, ()))
 
     def get_by_id(self, invoice_id: str) -> Optional[Invoice]:
-        m = self.repo.find(lambda x: x.get("id") == invoice_id)
-        if not m:
-            return None
-        try:
-            return Invoice(**m[0])
-        except ValidationError:
-            return None
+        inv = self._cached()[2].get(invoice_id)
+        # copie profonde : `lines` est une liste partagée avec le cache
+        return inv.model_copy(deep=True) if inv is not None else None
 
     def update_invoice(self, inv: Invoice) -> Invoice:
+        self._cache = None
         self.repo.update(inv.model_dump())
         return inv
 
@@ -162,100 +348,96 @@ class InvoiceService:
         if not inv.number:
             inv.number = self._next_invoice_number(inv.type)
         # total (somme des lignes)
-        inv.total_ttc_cent = sum(ln.total_line_ttc_cent for ln in inv.lines)
+        inv.total_ttc_cent = _invoice_total(inv.lines)
+        self._cache = None
         self.repo.add(inv.model_dump())
         return inv
 
     # ----------- génération -----------
+    def _gen(self, q: Quote, inv_type: str, label: str, amount: int) -> Invoice:
+        """Facture émise à une seule ligne (acompte, solde, récapitulatif) rattachée au devis."""
+        inv = Invoice(
+            type=inv_type, status="ISSUED",
+            quote_id=q.id, client_id=q.client_id,
+            lines=[InvoiceLine(label=label, qty=1.0,
+                               unit_price_ttc_cent=amount, total_line_ttc_cent=amount)],
+            total_ttc_cent=amount,
+            notes=_NOTES_TVA
+        )
+        return self.add_invoice(inv)
+
     def gen_deposit(self, q: Quote, pct: Optional[float] = None, explicit_amount: Optional[int] = None) -> Invoice:
         if explicit_amount is not None:
             amount = int(explicit_amount)
         else:
-            s = _load_json(SETTINGS_JSON) or {}
+            s = _load_settings()
             default_pct = float((s.get("acompte_pct") or 30))
             deposit_pct = float(pct if pct is not None else default_pct)
             deposit_pct = max(0.0, min(100.0, deposit_pct))
             amount = int(round(q.total_ttc_cent * (deposit_pct / 100.0)))
-
-        inv = Invoice(
-            type="ACOMPTE", status="ISSUED",
-            quote_id=q.id, client_id=q.client_id,
-            lines=[InvoiceLine(label=f"Acompte sur devis {q.number}", qty=1.0,
-                               unit_price_ttc_cent=amount, total_line_ttc_cent=amount)],
-            total_ttc_cent=amount,
-            notes="TVA non applicable, art. 293 B du CGI."
-        )
-        return self.add_invoice(inv)
+        return self._gen(q, "ACOMPTE", f"Acompte sur devis {q.number}", amount)
 
     def gen_balance(self, q: Quote, explicit_amount: Optional[int] = None) -> Invoice:
         remaining = int(explicit_amount) if explicit_amount is not None else q.remaining_cent()
-        inv = Invoice(
-            type="SOLDE", status="ISSUED",
-            quote_id=q.id, client_id=q.client_id,
-            lines=[InvoiceLine(label=f"Solde sur devis {q.number}", qty=1.0,
-                               unit_price_ttc_cent=remaining, total_line_ttc_cent=remaining)],
-            total_ttc_cent=remaining,
-            notes="TVA non applicable, art. 293 B du CGI."
-        )
-        return self.add_invoice(inv)
+        return self._gen(q, "SOLDE", f"Solde sur devis {q.number}", remaining)
 
     def gen_final(self, q: Quote) -> Invoice:
         # Récapitulatif (peut être enrichi si nécessaire)
-        inv = Invoice(
-            type="FINALE", status="ISSUED",
-            quote_id=q.id, client_id=q.client_id,
-            lines=[InvoiceLine(label=f"Facture finale – Récap devis {q.number}", qty=1.0,
-                               unit_price_ttc_cent=0, total_line_ttc_cent=0)],
-            total_ttc_cent=0,
-            notes="TVA non applicable, art. 293 B du CGI."
-        )
-        return self.add_invoice(inv)
+        return self._gen(q, "FINALE", f"Facture finale – Récap devis {q.number}", 0)
 
     # ----------- numérotation -----------
     def _next_invoice_number(self, inv_type: str) -> str:
-        s = _load_json(SETTINGS_JSON) or {}
-        numbering = s.get("numbering", {})
+        return self.reserve_numbers(inv_type, 1)[0]
+
+    def reserve_numbers(self, inv_type: str, k: int) -> List[str]:
+        """
+        Réserve k numéros consécutifs pour un type de facture (facturation en lot).
+        Le compteur vit dans un petit fichier dédié (data/.invoice_seq_<code>),
+        persisté immédiatement sous verrou fichier : pas de numéro attribué deux fois,
+        même par deux instances de l'application, et settings.json n'est plus réécrit
+        à chaque facture.
+        """
+        numbering = _load_settings().get("numbering", {})
         base_prefix = numbering.get("invoice_prefix", "FAC-")
-        t_map = {"ACOMPTE": "A", "SOLDE": "S", "FINALE": "F"}
-        prefix = f"{base_prefix}{t_map.get(inv_type, 'X')}-"
-        seq_key = f"invoice_seq_{t_map.get(inv_type, 'X')}"
-        seq = numbering.get(seq_key, 1)
-        number = f"{prefix}{seq:04d}"
-        numbering[seq_key] = seq + 1
-        s["numbering"] = numbering
-        _dump_json(SETTINGS_JSON, s)
-        return number
+        code = _INVOICE_TYPE_CODES.get(inv_type, "X")
+        prefix = f"{base_prefix}{code}-"
+        k = max(0, int(k))
+        path = DATA_DIR / f".invoice_seq_{code}"
+        with _seq_lock, _seq_file_lock(path):
+            try:
+                seq = int(path.read_bytes())
+            except FileNotFoundError:
+                # migration : reprise du compteur historique de settings.json
+                seq = int(numbering.get(f"invoice_seq_{code}", 1))
+            except ValueError as e:
+                # fichier vide ou édité à la main : pas de repli sur settings.json,
+                # dont le compteur est périmé depuis la migration (numéros en double)
+                raise RuntimeError(
+                    f"Compteur de factures illisible : {path} (attendu : un entier, "
+                    "le prochain numéro à attribuer)"
+                ) from e
+            if k:
+                _write_seq(path, seq + k)
+        return [f"{prefix}{n:04d}" for n in range(seq, seq + k)]
 
     # ----------- clients ----------
     def _client_name(self, client_id: str) -> str:
-        data = _load_json(CLIENTS_JSON) or []
-        for d in data:
-            try:
-                c = Client(**d)
-            except ValidationError:
-                continue
-            if c.id == client_id:
-                return c.name
-        return "Client"
+        # index id → client tenu par ClientService (reconstruit seulement si clients.json change)
+        c = self._clients.get_by_id(client_id)
+        return c.name if c is not None else "Client"
 
     # ----------- export PDF ----------
-    def _render_invoice_html(self, inv: Invoice) -> str:
+    def _render_invoice_html(self, inv: Invoice, cname: Optional[str] = None) -> str:
         """
         Rend le HTML de facture en mémoire via Jinja2: templates/pdf/invoice.html
         """
-        from jinja2 import Environment, FileSystemLoader, select_autoescape
-
-        env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=select_autoescape(["html", "xml"])
-        )
-        tpl = env.get_template("invoice.html")
+        tpl = _jinja_env().get_template("invoice.html")
 
-        settings = _load_json(SETTINGS_JSON) or {}
-        company = settings.get("company", {}) if isinstance(settings, dict) else {}
+        company = _load_settings().get("company", {})
 
-        # client name
-        cname = self._client_name(inv.client_id)
+        # client name (déjà résolu par export_invoice_pdf le cas échéant)
+        if cname is None:
+            cname = self._client_name(inv.client_id)
 
         ctx = {
             "invoice": {
@@ -285,39 +467,44 @@ class InvoiceService:
     def export_invoice_pdf(self, inv: Invoice, out_dir: Optional[str] = None) -> str:
         """
         Génére le PDF de facture (PDF only).
-        Essaie wkhtmltopdf (pdfkit) en priorité, sinon fallback WeasyPrint.
+        Essaie wkhtmltopdf en priorité (direct, puis via pdfkit), sinon fallback WeasyPrint.
         """
-        html = self._render_invoice_html(inv)
+        cname = self._client_name(inv.client_id)  # une seule résolution : HTML + nom de fichier
+        html = self._render_invoice_html(inv, cname)
 
         exports_dir = Path(out_dir) if out_dir else (EXPORTS_DIR / "factures")
         exports_dir.mkdir(parents=True, exist_ok=True)
 
-        cname = self._client_name(inv.client_id)
         safe_client = _slug(cname)
-        type_code = {"ACOMPTE": "FAC-A", "SOLDE": "FAC-S", "FINALE": "FAC-F"}.get(inv.type, "FAC-X")
+        type_code = f"FAC-{_INVOICE_TYPE_CODES.get(inv.type, 'X')}"
         tail = (inv.number or inv.id).split("-")[-1]
         filename = f"{type_code}-{tail} ({safe_client}).pdf"
         out_path = exports_dir / filename
 
-        base_url = str(TEMPLATES_DIR.resolve())
-
-        # 1) wkhtmltopdf d'abord
+        # 1) wkhtmltopdf d'abord : appel direct, pdfkit en secours
         wkhtml = _find_wkhtmltopdf()
         if wkhtml:
             try:
-                config = pdfkit.configuration(wkhtmltopdf=wkhtml)
+                _render_pdf_with_wkhtmltopdf(wkhtml, html, out_path)
+                return str(out_path)
+            except Exception as e:
+                import logging
+                logging.getLogger(__name__).warning("Échec wkhtmltopdf direct (%s). Essai via pdfkit...", e)
+            try:
+                import pdfkit
+
+                config = _pdfkit_config(wkhtml)
                 options = {
                     "enable-local-file-access": None,
                     "quiet": "",
                     "encoding": "UTF-8",
                 }
-                css_path = str((TEMPLATES_DIR / "stylesheet.css").resolve())
-                pdfkit.from_string(html, str(out_path), options=options, configuration=config, css=css_path)
+                pdfkit.from_string(html, str(out_path), options=options, configuration=config, css=_CSS_PATH)
                 return str(out_path)
             except Exception as e:
                 import logging
                 logging.getLogger(__name__).warning("Échec wkhtmltopdf (%s). Fallback WeasyPrint...", e)
 
         # 2) Fallback WeasyPrint
-        _render_pdf_with_weasyprint(html, out_path, base_url=base_url)
+        _render_pdf_with_weasyprint(html, out_path, base_url=_BASE_URL)
         return str(out_path)
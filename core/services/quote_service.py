@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import re
+from decimal import Decimal, InvalidOperation
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from datetime import datetime, date
@@ -32,8 +35,13 @@ def _escape_html(s: Any) -> str:
     return escape("" if s is None else str(s))
 
 def _find_wkhtmltopdf_exe() -> Optional[str]:
+    import os
+    return _locate_wkhtmltopdf_exe(os.environ.get("WKHTMLTOPDF_PATH"))
+
+@lru_cache(maxsize=4)
+def _locate_wkhtmltopdf_exe(env_path: Optional[str]) -> Optional[str]:
+    """Recherche (PATH, emplacements Windows) faite une fois par valeur de WKHTMLTOPDF_PATH."""
     import os, shutil
-    env_path = os.environ.get("WKHTMLTOPDF_PATH")
     if env_path and os.path.isfile(env_path):
         return env_path
     p = shutil.which("wkhtmltopdf")
@@ -49,6 +57,11 @@ def _find_wkhtmltopdf_exe() -> Optional[str]:
             return c
     return None
 
+@lru_cache(maxsize=4)
+def _pdfkit_config(wkhtml: str):
+    import pdfkit
+    return pdfkit.configuration(wkhtmltopdf=wkhtml)
+
 def _to_dict(obj: Any) -> Dict[str, Any]:
     if isinstance(obj, dict):
         return dict(obj)
@@ -59,9 +72,9 @@ def _to_dict(obj: Any) -> Dict[str, Any]:
     except Exception:
         return {}
 
+_NON_DECIMAL = re.compile(r"[^0-9,.\-]")
+
 def _clean_decimal(val: Any):
-    from decimal import Decimal, InvalidOperation
-    import re
     if val is None or val == "":
         return None
     if isinstance(val, (int, float)):
@@ -70,7 +83,7 @@ def _clean_decimal(val: Any):
         except Exception:
             return None
     s = str(val)
-    s = re.sub(r"[^0-9,.\-]", "", s)
+    s = _NON_DECIMAL.sub("", s)
     s = s.replace(",", ".")
     try:
         return Decimal(s)
@@ -197,23 +210,18 @@ class QuoteService:
             except Exception:
                 pass
 
+        # index ref / libellé tenus par le catalogue (produits d'abord, puis services)
         ref = (line.get("ref") or "").strip()
         if ref:
-            for p in self.catalog.list_products():
-                if (p.ref or "").strip() == ref:
-                    return p.model_dump() if hasattr(p, "model_dump") else dict(p.__dict__)
-            for s in self.catalog.list_services():
-                if (s.ref or "").strip() == ref:
-                    return s.model_dump() if hasattr(s, "model_dump") else dict(s.__dict__)
+            it = self.catalog.find_by_ref(ref)
+            if it is not None:
+                return it.model_dump() if hasattr(it, "model_dump") else dict(it.__dict__)
 
-        lbl = (line.get("label") or line.get("name") or "").strip().casefold()
-        if lbl:
-            for p in self.catalog.list_products():
-                if ((p.label or p.name or "").strip().casefold() == lbl):
-                    return p.model_dump() if hasattr(p, "model_dump") else dict(p.__dict__)
-            for s in self.catalog.list_services():
-                if ((s.label or s.name or "").strip().casefold() == lbl):
-                    return s.model_dump() if hasattr(s, "model_dump") else dict(s.__dict__)
+        lbl = line.get("label") or line.get("name") or ""
+        if lbl.strip():
+            it = self.catalog.find_by_label(lbl)
+            if it is not None:
+                return it.model_dump() if hasattr(it, "model_dump") else dict(it.__dict__)
 
         return None
 
@@ -242,7 +250,6 @@ class QuoteService:
                     except Exception:
                         pass
             # euros
-            from decimal import Decimal
             for k in ("price_eur","unit_price_eur","ttc_eur"):
                 v = d.get(k)
                 if v not in (None, ""):
@@ -351,10 +358,12 @@ class QuoteService:
         raw_payments = qd.get("payments", [])
         pay_objs = [self._hydrate_payment_obj(_to_dict(p)) for p in raw_payments if p is not None]
 
+        # lignes déjà validées par _hydrate_line : pydantic reprend les instances telles quelles
+        # (pas de model_dump puis re-validation de chaque ligne)
         if _HAS_PYDANTIC and hasattr(Quote, "model_fields") and "items" in Quote.model_fields:  # type: ignore
-            qd["items"] = [ln.model_dump() if hasattr(ln, "model_dump") else _to_dict(ln) for ln in line_objs]
+            qd["items"] = line_objs
         else:
-            qd["lines"] = [ln.model_dump() if hasattr(ln, "model_dump") else _to_dict(ln) for ln in line_objs]
+            qd["lines"] = line_objs
 
         qd["payments"] = [vars(p) for p in pay_objs]
         qd["total_ht_cent"] = total
@@ -389,8 +398,15 @@ class QuoteService:
 
     def recalc_totals(self, quote: Quote | Dict[str, Any]) -> Quote | Dict[str, Any]:
         is_dict = isinstance(quote, dict)
-        qd = _to_dict(quote)
-        raw_lines = self._normalize_lines_key(qd)
+        # seules les lignes servent au calcul : pas de copie/model_dump du devis entier
+        # (add_quote/update_quote le sérialisent une fois, après recalcul)
+        if is_dict:
+            raw_lines = self._normalize_lines_key(quote)
+        else:
+            lines = getattr(quote, "items", None)
+            if lines is None:
+                lines = getattr(quote, "lines", [])
+            raw_lines = [_to_dict(x) for x in lines] if isinstance(lines, list) else []
         # recalcul robustes
         new_lines: List[Dict[str, Any]] = []
         total = 0
@@ -452,11 +468,15 @@ class QuoteService:
     def list_by_client(self, client_id: str) -> List[Quote]:
         return [self._hydrate_quote(d) for d in self.repo.find(lambda d: d.get("client_id") == client_id)]
 
-    def load_client_map(self) -> Dict[str, Any]:
+    @cached_property
+    def _clients(self):
+        # une seule instance : sa liste hydratée n'est relue que si clients.json change
         from core.services.client_service import ClientService
-        cs = ClientService()
+        return ClientService()
+
+    def load_client_map(self) -> Dict[str, Any]:
         out: Dict[str, Any] = {}
-        for c in cs.list_clients():
+        for c in self._clients.list_clients():
             cid = getattr(c, "id", None)
             if cid:
                 out[cid] = c
@@ -487,7 +507,6 @@ class QuoteService:
                 if v not in (None, "", 0):
                     try: return int(v)
                     except Exception: pass
-            from decimal import Decimal
             for k in ("price_eur","unit_price_eur","ttc_eur"):
                 v = d.get(k)
                 if v not in (None, ""):
@@ -610,7 +629,7 @@ class QuoteService:
                 "wkhtmltopdf introuvable. Installez-le puis relancez l'application.\n"
                 "Ou définissez la variable d'environnement WKHTMLTOPDF_PATH vers wkhtmltopdf.exe."
             )
-        config = pdfkit.configuration(wkhtmltopdf=wkhtml)
+        config = _pdfkit_config(wkhtml)
         options = {"quiet": "", "encoding": "UTF-8", "enable-local-file-access": None}
         pdfkit.from_string(html, str(pdf_path), configuration=config, options=options)
         return str(pdf_path)
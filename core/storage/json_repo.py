@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import glob
 import json
+import os
 import shutil
 import threading
 from datetime import date, datetime
@@ -19,6 +20,13 @@ except Exception:  # pragma: no cover
             return dict(self.__dict__)
 
 
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    _HAS_ORJSON = False
+
+
 T = TypeVar("T", bound=Union[BaseModel, Mapping[str, Any]])
 
 
@@ -28,11 +36,33 @@ def _json_default(o: Any) -> Any:
     return str(o)
 
 
+def _loads(buf: bytes) -> Any:
+    if _HAS_ORJSON:
+        return orjson.loads(buf)
+    return json.loads(buf.decode("utf-8"))
+
+
+def _dumps(data: Any) -> bytes:
+    """
+    JSON UTF-8 indenté (2 espaces, sans échappement ASCII), via orjson si installé.
+    Rendu proche de json.dumps mais pas identique : flottants écrits 0.00001 / 1e16
+    (json : 1e-05 / 1e+16), NaN/Infinity écrits null. Les valeurs refusées par orjson
+    (entiers au-delà de 64 bits…) repassent par json, comme avant.
+    """
+    if _HAS_ORJSON:
+        try:
+            return orjson.dumps(data, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2, default=_json_default).encode("utf-8")
+
+
 class JsonRepository(Generic[T]):
     """
     Repo JSON générique avec clé primaire configurable.
     - Rotation de backups (backup_enabled, backup_keep)
     - N'écrit pas si le contenu ne change pas (réduction du bruit et des .bak)
+    - Écriture atomique (fichier temporaire + os.replace)
     """
 
     def __init__(
@@ -59,8 +89,7 @@ class JsonRepository(Generic[T]):
 
     def _read_raw(self) -> List[Dict[str, Any]]:
         try:
-            with self.filepath.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = _loads(self.filepath.read_bytes())
             return data if isinstance(data, list) else []
         except FileNotFoundError:
             return []
@@ -73,6 +102,14 @@ class JsonRepository(Generic[T]):
                 pass
             return []
 
+    def stat_key(self) -> Optional[tuple]:
+        """(mtime_ns, taille) du fichier : change dès que le contenu lu change (y compris édition à la main)."""
+        try:
+            st = self.filepath.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
     def _rotate_backups(self) -> None:
         if not self.backup_enabled or self.backup_keep <= 0:
             return
@@ -88,12 +125,12 @@ class JsonRepository(Generic[T]):
 
     def _write_raw(self, data: Iterable[Mapping[str, Any]]) -> None:
         with self._lock:
-            new_dump = json.dumps(list(data), ensure_ascii=False, indent=2, default=_json_default)
+            new_dump = _dumps(list(data))
 
             # si contenu identique → ne rien faire
             if self.filepath.exists():
                 try:
-                    cur = self.filepath.read_text(encoding="utf-8")
+                    cur = self.filepath.read_bytes()
                     if cur == new_dump:
                         return
                 except Exception:
@@ -109,9 +146,13 @@ class JsonRepository(Generic[T]):
                     pass
                 self._rotate_backups()
 
-            # write
-            with self.filepath.open("w", encoding="utf-8") as f:
+            # write : fichier temporaire puis os.replace (atomique, jamais de JSON à moitié écrit).
+            # Nom propre au processus et au thread : deux écrivains du même fichier
+            # (autre instance, autre processus) ne se volent pas le temporaire.
+            tmp = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with tmp.open("wb") as f:
                 f.write(new_dump)
+            os.replace(tmp, self.filepath)
 
     # ---------------- Helpers ---------------- #
 
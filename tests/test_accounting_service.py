@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from core.services.accounting_service import AccountingService
+from core.storage.json_repo import JsonRepository
+
+
+def test_list_entries_skips_invalid_rows(tmp_path):
+    path = tmp_path / "accounting_entries.json"
+    JsonRepository(path)._write_raw([
+        {"id": "a", "date": "2024-12-31T10:00:00", "type": "VENTE", "amount_cent": 1000},
+        {"id": "b", "date": "31/12/2024", "type": "VENTE", "amount_cent": 2000},
+        {"id": "c", "date": "2024-12-31T10:00:00Z", "type": "ACOMPTE", "amount_cent": 3000},
+        {"id": "d", "date": "2024-12-31T10:00:00", "type": "INCONNU", "amount_cent": 4000},
+    ])
+
+    entries = AccountingService(str(path)).list_entries()
+
+    ids = [e.id for e in entries]
+    assert "a" in ids and "b" not in ids and "d" not in ids
+    assert isinstance(entries[0].date, datetime)
+    # "Z" final : accepté par la validation pydantic même là où fromisoformat le refuse (3.10)
+    assert "c" in ids
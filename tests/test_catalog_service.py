@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from core.services.catalog_service import CatalogService, _eur_to_cents
+
+
+def _catalog(tmp_path):
+    return CatalogService(data_dir=tmp_path)
+
+
+def test_eur_to_cents_uses_integer_arithmetic():
+    assert _eur_to_cents("18,50") == 1850
+    assert _eur_to_cents(" 18.5 ") == 1850
+    assert _eur_to_cents(18.5) == 1850
+    assert _eur_to_cents(0.1 + 0.2) == 30
+    assert _eur_to_cents("2,005") == 201
+    assert _eur_to_cents("-3") == -300
+    for bad in ("", "abc", "1.2.3", "1e3"):
+        with pytest.raises(ValueError):
+            _eur_to_cents(bad)
+
+
+def test_list_follows_hand_edits(tmp_path):
+    svc = _catalog(tmp_path)
+    svc.add_product({"name": "Lyre", "price_eur": 120})
+    assert [p.name for p in svc.list_products()] == ["Lyre"]
+
+    path = tmp_path / "products.json"
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    rows[0]["name"] = "Lyre LED (modifiée)"
+    path.write_text(json.dumps(rows), encoding="utf-8")
+    assert [p.name for p in svc.list_products()] == ["Lyre LED (modifiée)"]
+
+
+def test_upsert_many_follows_key_changes_within_the_batch(tmp_path):
+    cat = _catalog(tmp_path)
+    repo = cat.products_repo
+    repo._write_raw([{"id": "p1", "ref": "A", "name": "Lyre", "unit": "j"}])
+
+    out = cat._smart_upsert_many(repo, [
+        {"id": "p1", "ref": "B"},                   # A → B
+        {"ref": "A", "name": "PAR", "unit": "u"},   # A n'existe plus : nouvelle ligne
+        {"ref": "B", "label": "Lyre LED"},          # retrouve p1 sous sa nouvelle réf
+    ])
+
+    rows = repo.list_all()
+    assert len(rows) == 2
+    assert out[0]["id"] == out[2]["id"] == "p1"
+    assert out[1]["id"] != "p1"
+    p1 = next(r for r in rows if r["id"] == "p1")
+    assert p1["ref"] == "B" and p1["label"] == "Lyre LED"
+
+
+def test_upsert_identical_payload_does_not_rewrite(tmp_path):
+    cat = _catalog(tmp_path)
+    repo = cat.services_repo
+    repo._write_raw([{"id": "s1", "ref": "DJ", "name": "DJ"}])
+    before = repo.stat_key()
+
+    cat._smart_upsert(repo, {"id": "s1", "name": "DJ"})
+
+    assert repo.stat_key() == before
+
+def test_name_only_update_keeps_price_unit_and_label(tmp_path):
+    from core.models.service import Service
+
+    cat = _catalog(tmp_path)
+    before = cat.add_service({"name": "Sono", "label": "Sono pro", "unit": "j", "price_eur": 150.5})
+
+    cat.update_service(Service(id=before["id"], name="Sono2"))
+
+    row = cat.services_repo.get_by_id(before["id"])
+    assert row["name"] == "Sono2"
+    assert row["label"] == "Sono pro"
+    assert row["unit"] == "j"
+    assert row["price_cents"] == 15050 and row["price_eur"] == 150.5
+
+
+def test_price_update_resyncs_both_price_fields(tmp_path):
+    cat = _catalog(tmp_path)
+    pid = cat.add_product({"name": "Lyre", "price_eur": 120})["id"]
+
+    cat.update_product({"id": pid, "price_eur": "99,90"})
+
+    row = cat.products_repo.get_by_id(pid)
+    assert row["price_cents"] == 9990 and row["label"] == "Lyre"
+
+
+def test_update_of_unknown_item_inserts_a_normalized_row(tmp_path):
+    cat = _catalog(tmp_path)
+
+    row = cat.update_service({"name": "Lumière", "price_cents": 4500})
+
+    assert row["label"] == "Lumière" and row["unit"] == "" and row["price_eur"] == 45.0
+
+
+def test_get_product_returns_a_copy_of_the_cached_object(tmp_path):
+    cat = _catalog(tmp_path)
+    pid = cat.add_product({"name": "Lyre", "price_eur": 120})["id"]
+
+    p = cat.get_product(pid)
+    p.name = "modifié"
+
+    assert cat.get_product(pid).name == "Lyre"
+    assert cat.list_products()[0].name == "Lyre"
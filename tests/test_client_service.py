@@ -0,0 +1,30 @@
+import json
+
+from core.models.client import Client
+from core.services.client_service import ClientService
+
+
+def test_invalid_rows_are_skipped(tmp_path):
+    path = tmp_path / "clients.json"
+    path.write_text(json.dumps([{"id": "x"}, {"id": "ok", "name": "B"}]), encoding="utf-8")
+    assert [c.id for c in ClientService(str(path)).list_clients()] == ["ok"]
+
+
+def test_cache_follows_writes_and_external_edits(tmp_path):
+    path = tmp_path / "clients.json"
+    svc = ClientService(str(path))
+    a = svc.add_client(Client(name="A"))
+    assert [c.name for c in svc.list_clients()] == ["A"]
+
+    svc.update_client(a.model_copy(update={"name": "A2"}))
+    assert svc.get_by_id(a.id).name == "A2"
+
+    # édition à la main (taille différente → nouvelle clé stat)
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    rows.append({"id": "ext", "name": "Ajouté à la main"})
+    path.write_text(json.dumps(rows), encoding="utf-8")
+    assert svc.get_by_id("ext").name == "Ajouté à la main"
+
+    svc.delete_client(a.id)
+    assert svc.get_by_id(a.id) is None
+    assert [c.id for c in svc.list_clients()] == ["ext"]
@@ -0,0 +1,12 @@
+import uuid
+
+from core.models.common import _ID_BATCH, gen_id
+
+
+def test_gen_id_yields_distinct_uuid4_across_buffer_refills():
+    ids = [gen_id() for _ in range(_ID_BATCH * 2 + 1)]
+
+    assert len(set(ids)) == len(ids)
+    for s in ids[:: _ID_BATCH // 2]:
+        u = uuid.UUID(s)
+        assert str(u) == s and u.version == 4 and u.variant == uuid.RFC_4122
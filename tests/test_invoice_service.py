@@ -0,0 +1,138 @@
+import sys
+
+import pytest
+
+from core.services.invoice_service import _construct_invoice, _render_pdf_with_wkhtmltopdf
+
+
+def test_rows_with_malformed_lines_go_through_validation():
+    row = {"id": "i1", "quote_id": "q", "client_id": "c", "lines": [
+        {"label": "Acompte", "unit_price_ttc_cent": 3000, "total_line_ttc_cent": 3000},
+    ]}
+    assert _construct_invoice(row).lines[0].label == "Acompte"
+
+    # ligne sans libellé : la validation la refuse au lieu d'un InvoiceLine incomplet
+    assert _construct_invoice({**row, "lines": [{"unit_price_ttc_cent": 3000}]}) is None
+    # montant en texte : converti par la validation, pas gardé tel quel
+    inv = _construct_invoice({**row, "lines": [{"label": "Solde", "total_line_ttc_cent": "1500"}]})
+    assert inv.lines[0].total_line_ttc_cent == 1500
+
+
+def test_cache_follows_add_and_update(tmp_path):
+    from core.models.invoice import Invoice, InvoiceLine
+    from core.services.invoice_service import InvoiceService
+
+    svc = InvoiceService(tmp_path / "invoices.json")
+    line = InvoiceLine(label="Acompte", unit_price_ttc_cent=3000, total_line_ttc_cent=3000)
+    a = svc.add_invoice(Invoice(number="FAC-A-0001", quote_id="q1", client_id="c", lines=[line]))
+    b = svc.add_invoice(Invoice(number="FAC-S-0001", type="SOLDE", quote_id="q1", client_id="c"))
+    svc.add_invoice(Invoice(number="FAC-A-0002", quote_id="q2", client_id="c"))
+
+    assert a.total_ttc_cent == 3000
+    assert [i.id for i in svc.list_by_quote("q1")] == [a.id, b.id]
+    assert svc.list_by_quote("absent") == []
+
+    svc.update_invoice(b.model_copy(update={"status": "PAID"}))
+    assert svc.get_by_id(b.id).status == "PAID"
+    assert [i.status for i in svc.list_by_quote("q1")] == ["DRAFT", "PAID"]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    from core.services import invoice_service
+
+    monkeypatch.setattr(invoice_service, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(invoice_service, "SETTINGS_JSON", tmp_path / "settings.json")
+    monkeypatch.setattr(invoice_service, "_settings_cache", None)
+    return tmp_path
+
+
+def test_reserve_numbers_migrates_the_settings_counter(data_dir):
+    from core.services.invoice_service import InvoiceService
+
+    (data_dir / "settings.json").write_text('{"numbering": {"invoice_prefix": "FAC-", "invoice_seq_A": 7}}')
+    svc = InvoiceService(data_dir / "invoices.json")
+
+    assert svc.reserve_numbers("ACOMPTE", 2) == ["FAC-A-0007", "FAC-A-0008"]
+    assert (data_dir / ".invoice_seq_A").read_bytes() == b"9"
+    # le fichier dédié fait foi ensuite, settings.json n'est plus relu pour le compteur
+    assert svc.reserve_numbers("ACOMPTE", 1) == ["FAC-A-0009"]
+    assert svc.reserve_numbers("SOLDE", 1) == ["FAC-S-0001"]
+
+
+_RESERVE_SCRIPT = """
+import sys
+from pathlib import Path
+from core.services import invoice_service
+invoice_service.DATA_DIR = Path(sys.argv[1])
+invoice_service.SETTINGS_JSON = Path(sys.argv[1]) / "settings.json"
+svc = invoice_service.InvoiceService(Path(sys.argv[1]) / "invoices.json")
+for _ in range(20):
+    print(svc.reserve_numbers("ACOMPTE", 1)[0])
+"""
+
+
+def test_reserve_numbers_is_unique_across_processes(data_dir):
+    import os
+    import subprocess
+    from pathlib import Path
+
+    root = str(Path(__file__).resolve().parents[1])
+    env = {**os.environ, "PYTHONPATH": root}
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _RESERVE_SCRIPT, str(data_dir)],
+                         stdout=subprocess.PIPE, text=True, env=env, cwd=root)
+        for _ in range(4)
+    ]
+    numbers = [n for p in procs for n in p.communicate()[0].split()]
+
+    assert all(p.returncode == 0 for p in procs)
+    assert sorted(numbers) == [f"FAC-A-{n:04d}" for n in range(1, 81)]
+
+
+def test_unreadable_sequence_file_raises_a_clear_error(data_dir):
+    from core.services.invoice_service import InvoiceService
+
+    (data_dir / "settings.json").write_text('{"numbering": {"invoice_seq_A": 3}}')
+    svc = InvoiceService(data_dir / "invoices.json")
+
+    for content in (b"", b"douze"):
+        (data_dir / ".invoice_seq_A").write_bytes(content)
+        with pytest.raises(RuntimeError, match="invoice_seq_A"):
+            svc.reserve_numbers("ACOMPTE", 1)
+        # le fichier n'est pas écrasé : la correction reste manuelle
+        assert (data_dir / ".invoice_seq_A").read_bytes() == content
+
+
+def _stub_wkhtmltopdf(tmp_path, *, code, write):
+    """Faux wkhtmltopdf : recopie stdin dans le PDF de sortie (ou non), puis sort avec `code`."""
+    script = tmp_path / "wk_stub.py"
+    script.write_text(
+        "import sys\n"
+        + ("open(sys.argv[-1], 'wb').write(sys.stdin.buffer.read())\n" if write else "sys.stdin.read()\n")
+        + f"sys.exit({code})\n"
+    )
+    if sys.platform == "win32":
+        launcher = tmp_path / "wk_stub.bat"
+        launcher.write_text(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        launcher = tmp_path / "wk_stub"
+        launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+        launcher.chmod(0o755)
+    return str(launcher)
+
+
+def test_wkhtmltopdf_warning_exit_code_with_output_is_success(tmp_path):
+    out = tmp_path / "out.pdf"
+
+    _render_pdf_with_wkhtmltopdf(_stub_wkhtmltopdf(tmp_path, code=1, write=True), "<html><head></head></html>", out)
+
+    assert b"<style>" in out.read_bytes()
+
+
+def test_wkhtmltopdf_failure_is_not_hidden_by_a_previous_export(tmp_path):
+    out = tmp_path / "out.pdf"
+    out.write_bytes(b"%PDF ancien export")
+
+    with pytest.raises(RuntimeError):
+        _render_pdf_with_wkhtmltopdf(_stub_wkhtmltopdf(tmp_path, code=1, write=False), "<html></html>", out)
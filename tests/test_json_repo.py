@@ -0,0 +1,37 @@
+from core.storage.json_repo import JsonRepository, _dumps, _loads
+
+
+def test_dumps_falls_back_for_values_orjson_rejects():
+    big = 2 ** 70
+    assert _loads(_dumps([{"n": big}])) == [{"n": big}]
+
+
+def test_write_then_read_roundtrip(tmp_path):
+    repo = JsonRepository(tmp_path / "items.json")
+    repo.add({"id": "a", "name": "Lyre"})
+    repo.update({"id": "a", "unit": "j"})
+
+    assert repo.list_all() == [{"id": "a", "name": "Lyre", "unit": "j"}]
+
+
+def test_write_is_atomic_and_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "items.json"
+    repo = JsonRepository(path, backup_enabled=False)
+    repo.add({"id": "a"})
+
+    assert [p.name for p in tmp_path.iterdir()] == ["items.json"]
+    assert _loads(path.read_bytes()) == [{"id": "a"}]
+
+
+def test_hand_edit_is_kept_by_next_write(tmp_path):
+    path = tmp_path / "items.json"
+    repo = JsonRepository(path, backup_enabled=False)
+    repo.add({"id": "a", "name": "Lyre"})
+    before = repo.stat_key()
+
+    path.write_bytes(_dumps([{"id": "a", "name": "Lyre LED"}]))
+    assert repo.stat_key() != before
+    assert repo.list_all() == [{"id": "a", "name": "Lyre LED"}]
+
+    repo.update({"id": "a", "unit": "j"})
+    assert repo.list_all() == [{"id": "a", "name": "Lyre LED", "unit": "j"}]